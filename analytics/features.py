@@ -1,59 +1,164 @@
-import statsmodels.api as sm
 from statsmodels.tsa.stattools import adfuller
-from sklearn.linear_model import HuberRegressor
 import numpy as np
+import pandas as pd
+from scipy.signal import correlate
+from numba import get_num_threads, njit, prange
 
 # For checking mean-reversion (Stationarity) using ADF test
 def adf_test(series):
     stat, pvalue, *_ = adfuller(series.dropna())
     return stat, pvalue
 
+# Rolling z-score in one pass: the mean and sample std come from running sums
+# (add the new value, drop the one leaving the window), and the same loop tracks
+# the run of equal values ending at i. A run of at least w means the window is
+# flat (peak-to-peak of zero), so z is set to 0 there instead of dividing by a
+# zero or round-off std. Values are shifted by the first one to limit
+# cancellation in s2 - s*s/w.
+@njit(cache=True, fastmath=True)
+def _rolling_zscore(arr, w, z):
+    offset = arr[0]
+    s = 0.0
+    s2 = 0.0
+    run = 0
+    for i in range(arr.shape[0]):
+        v = arr[i] - offset
+        s += v
+        s2 += v * v
+        if i >= w:
+            old = arr[i - w] - offset
+            s -= old
+            s2 -= old * old
+
+        if i > 0 and arr[i] == arr[i - 1]:
+            run += 1
+        else:
+            run = 1
+
+        if i < w - 1 or w < 2:
+            z[i] = np.nan
+        elif run >= w:
+            z[i] = 0.0
+        else:
+            mean = s / w
+            # Clamp tiny negative variances left by floating-point cancellation
+            std = np.sqrt(max(s2 - s * s / w, 0.0) / (w - 1))
+            z[i] = (v - mean) / std
+
 # Calculating spread and its z-score
 def spread_and_zscore(y, x, hr, window):
     spread = y - hr * x
-    mean = spread.rolling(window).mean()
-    std = spread.rolling(window).std()
-    z = (spread - mean) / std
-    return spread, z
+    arr = np.ascontiguousarray(spread.values, dtype=np.float64)
+    z = np.empty(arr.shape[0])
+    if arr.shape[0] > 0:
+        _rolling_zscore(arr, window, z)
+    return spread, pd.Series(z, index=spread.index)
+
+# Huber regression y ~ alpha + beta * x by iteratively reweighted least squares.
+# Starts from OLS; residuals beyond eps robust-scale units (MAD) are down-weighted.
+@njit(cache=True, fastmath=True)
+def _huber_slope(y, x, eps=1.35, max_iter=50, tol=1e-10):
+    # A flat hedge leg has no slope to estimate
+    dx = x - x.mean()
+    if (dx * dx).sum() == 0.0:
+        return np.nan
+
+    w = np.ones(y.shape[0])
+    beta = 0.0
+
+    for it in range(max_iter):
+        # Weighted least squares with intercept
+        sw = w.sum()
+        xm = (w * x).sum() / sw
+        ym = (w * y).sum() / sw
+        dx = x - xm
+        new_beta = (w * dx * (y - ym)).sum() / (w * dx * dx).sum()
+        alpha = ym - new_beta * xm
+
+        converged = it > 0 and abs(new_beta - beta) <= tol * (1.0 + abs(beta))
+        beta = new_beta
+        if converged:
+            break
+
+        r = np.abs(y - alpha - beta * x)
+        scale = 1.4826 * np.median(r)
+        if scale == 0.0:
+            break
+        w = np.minimum(1.0, eps * scale / (r + 1e-12))
+
+    return beta
 
 # Calculating hedge ratio using Huber regression
 def huber_hedge_ratio(y, x):
-    model = HuberRegressor().fit(x.values.reshape(-1,1), y.values)
-    return model.coef_[0]
+    y_arr = np.ascontiguousarray(y.values, dtype=np.float64)
+    x_arr = np.ascontiguousarray(x.values, dtype=np.float64)
+    return _huber_slope(y_arr, x_arr)
+
 
 
 # Calculating R-squared using standard OLS regression (y ~ alpha + beta * x)
 def ols_r2(y, x):
-    x_with_const = sm.add_constant(x.values)
-    model = sm.OLS(y.values, x_with_const).fit()
-    return model.rsquared
+    xv = x.to_numpy(dtype=np.float64)
+    yv = y.to_numpy(dtype=np.float64)
+    dx = xv - xv.mean()
+    dy = yv - yv.mean()
 
+    ss_x = dx @ dx
+    ss_tot = dy @ dy
+    # A flat leg explains nothing
+    if ss_x == 0 or ss_tot == 0:
+        return 0.0
 
-# Calculating time-varying hedge ratio using Kalman Filter
-def kalman_hedge_ratio(y, x, delta=1e-4, R=0.01):
-    """
-    Returns time-varying hedge ratio using Kalman Filter
-    """
-    n = len(y)
+    beta = (dx @ dy) / ss_x
+    ss_res = np.square(dy - beta * dx).sum()
+    return 1.0 - ss_res / ss_tot
+
+
+# Kalman filter loop on raw float64 arrays, compiled with numba
+@njit(cache=True, fastmath=True)
+def _kalman_1d(y, x, Q, R):
+    n = y.shape[0]
     hr = np.zeros(n)
 
     P = 1.0
-    Q = delta / (1 - delta)
+    hr_prev = 0.0
 
     for t in range(n):
         if t > 0:
             P = P + Q
 
         # Measurement update
-        y_hat = hr[t-1] * x.iloc[t] if t > 0 else 0
-        e = y.iloc[t] - y_hat
-        K = P * x.iloc[t] / (x.iloc[t]**2 * P + R)
+        x_t = x[t]
+        y_hat = hr_prev * x_t
+        e = y[t] - y_hat
+        K = P * x_t / (x_t * x_t * P + R)
 
-        hr[t] = hr[t-1] + K * e if t > 0 else 0
-        P = (1 - K * x.iloc[t]) * P
+        if t > 0:
+            hr_prev = hr_prev + K * e
+        hr[t] = hr_prev
+        P = (1 - K * x_t) * P
 
     return hr
 
+# Calculating time-varying hedge ratio using Kalman Filter
+def kalman_hedge_ratio(y, x, delta=1e-4, R=0.01):
+    """
+    Returns time-varying hedge ratio using Kalman Filter
+    """
+    y_arr = np.ascontiguousarray(y.values, dtype=np.float64)
+    x_arr = np.ascontiguousarray(x.values, dtype=np.float64)
+    Q = delta / (1 - delta)
+
+    return _kalman_1d(y_arr, x_arr, Q, R)
+
+# Compile once at import so the first dashboard run doesn't pay the JIT cost.
+# Warm up through the public functions so numba sees the same array flags
+# (pandas may hand out read-only arrays) as real calls.
+_warmup = pd.Series(np.arange(1.0, 5.0))
+kalman_hedge_ratio(_warmup, _warmup)
+huber_hedge_ratio(_warmup, _warmup + 1.0)
+spread_and_zscore(_warmup, _warmup + 1.0, 1.0, 2)
+
 # Calculating rolling correlation between two series
 def rolling_corr(x, y, window):
     return x.rolling(window).corr(y)
@@ -94,7 +199,98 @@ class AlertEngine:
         
         return alerts
     
+# Cross-correlation via one FFT: sum(x[i] * y[i - lag]) for every lag at once,
+# with per-overlap sums from prefix sums so each lag gets the exact Pearson value.
+# Expects centered inputs.
+def _cross_corr_fft(xv, yv, max_lag):
+    n = len(xv)
+    full = correlate(xv, yv, mode="full", method="fft")   # index n - 1 is lag 0
+
+    cx = np.concatenate(([0.0], np.cumsum(xv)))
+    cy = np.concatenate(([0.0], np.cumsum(yv)))
+    cxx = np.concatenate(([0.0], np.cumsum(xv * xv)))
+    cyy = np.concatenate(([0.0], np.cumsum(yv * yv)))
+
+    lag = np.arange(-max_lag, max_lag + 1)
+    m = np.clip(n - np.abs(lag), 0, None)
+    x_lo = np.minimum(np.maximum(lag, 0), n)
+    y_lo = np.minimum(np.maximum(-lag, 0), n)
+    x_hi = x_lo + m
+    y_hi = y_lo + m
+
+    sxy = np.where(m > 0, full[np.clip(lag + n - 1, 0, 2 * n - 2)], 0.0)
+    sx = cx[x_hi] - cx[x_lo]
+    sy = cy[y_hi] - cy[y_lo]
+    sxx = cxx[x_hi] - cxx[x_lo]
+    syy = cyy[y_hi] - cyy[y_lo]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / m
+        var_x = sxx - sx * sx / m
+        var_y = syy - sy * sy / m
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[m < 2] = np.nan
+    return corr
+
+# Cross-correlation by direct sums over each overlap, lags spread across cores.
+# Expects centered inputs.
+@njit(cache=True, parallel=True, error_model="numpy")
+def _cross_corr_direct(xv, yv, max_lag):
+    n = xv.shape[0]
+    corr = np.empty(2 * max_lag + 1)
+
+    for k in prange(2 * max_lag + 1):
+        lag = k - max_lag
+        m = n - abs(lag)
+        if m < 2:
+            corr[k] = np.nan
+            continue
+
+        x_lo = max(lag, 0)
+        y_lo = max(-lag, 0)
+        sx = 0.0
+        sy = 0.0
+        sxx = 0.0
+        syy = 0.0
+        sxy = 0.0
+        for i in range(m):
+            a = xv[x_lo + i]
+            b = yv[y_lo + i]
+            sx += a
+            sy += b
+            sxx += a * a
+            syy += b * b
+            sxy += a * b
+
+        cov = sxy - sx * sy / m
+        var_x = sxx - sx * sx / m
+        var_y = syy - sy * sy / m
+        corr[k] = cov / np.sqrt(var_x * var_y)
+
+    return corr
+
+# Calculating cross-correlation of x against y shifted by each lag,
+# i.e. corr(x[i], y[i - lag]) over the overlapping part of the series
 def cross_corr(x, y, max_lag=20):
     lags = range(-max_lag, max_lag + 1)
-    corr = [x.corr(y.shift(lag)) for lag in lags]
-    return lags, corr
+    xv = x.to_numpy(dtype=np.float64)
+    yv = y.to_numpy(dtype=np.float64)
+    n = len(xv)
+    if n == 0:
+        return lags, np.full(len(lags), np.nan)
+
+    # Correlation is shift-invariant; centering keeps the sums well scaled
+    xv = xv - xv.mean()
+    yv = yv - yv.mean()
+
+    # Measured on one core: the direct kernel costs ~1.25 ns per (bar, lag)
+    # pair and the FFT path ~0.2 ms + ~7 ns * n log2(n), so the FFT only pays
+    # off past roughly 70-130 lags. The direct kernel also scales with cores.
+    direct_cost = len(lags) * n / get_num_threads()
+    fft_cost = 6.0 * n * np.log2(n) + 160_000
+    if direct_cost > fft_cost:
+        return lags, _cross_corr_fft(xv, yv, max_lag)
+    return lags, _cross_corr_direct(xv, yv, max_lag)
+
+# Warm up the parallel cross-correlation kernel once at import
+cross_corr(_warmup, _warmup, max_lag=1)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def mean_reversion_backtest(z, entry_z=2.0, exit_z=0.1):
@@ -6,27 +7,18 @@ def mean_reversion_backtest(z, entry_z=2.0, exit_z=0.1):
     if len(z) < 5:
         return 0.0, pd.Series([], dtype=float)
 
-    position = 0
-    pnl = 0.0
-    equity_curve = []
-    timestamps = []
+    zv = z.to_numpy(dtype=np.float64)
+    prev_z = zv[:-1]
 
-    for i in range(1, len(z)):
-        prev_z = z.iloc[i-1]
-        curr_z = z.iloc[i]
+    # Exit rule wins over entry rules; NaN means "keep the current position"
+    signal = np.where(
+        np.abs(prev_z) < exit_z, 0.0,
+        np.where(prev_z > entry_z, -1.0,
+                 np.where(prev_z < -entry_z, 1.0, np.nan))
+    )
+    position = pd.Series(signal).ffill().fillna(0.0).to_numpy()
 
-        # Entry rules
-        if prev_z > entry_z:
-            position = -1
-        elif prev_z < -entry_z:
-            position = 1
+    equity_curve = np.cumsum(position * np.diff(zv))
+    pnl = float(equity_curve[-1])
 
-        # Exit rule
-        if abs(prev_z) < exit_z:
-            position = 0
-
-        pnl += position * (curr_z - prev_z)
-        equity_curve.append(pnl)
-        timestamps.append(z.index[i])
-
-    return pnl, pd.Series(equity_curve, index=timestamps)
\ No newline at end of file
+    return pnl, pd.Series(equity_curve, index=z.index[1:])
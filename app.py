@@ -1,10 +1,12 @@
 import asyncio
+import atexit
 import threading
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
 import plotly.graph_objects as go
+import numpy as np
 import time
-import pandas as pd
+import pyarrow.csv as pa_csv
 
 from ingestion.binance_websocket import BinanceFuturesWS
 from ingestion.duckdb_storage import TickStore
@@ -22,12 +24,21 @@ from config import (
     SYMBOLS,
     TIMEFRAMES,
     DB_PATH,
+    DUCKDB_CONFIG,
+    RECENT_TICKS,
     DEFAULT_WINDOW,
     DEFAULT_Z_THRESHOLD
 )
 
 # -------------------- STORAGE --------------------
-store = TickStore(DB_PATH)
+# One store per process: it owns the DuckDB connection and the flusher thread
+@st.cache_resource
+def get_store():
+    tick_store = TickStore(DB_PATH, config=DUCKDB_CONFIG)
+    atexit.register(tick_store.flush)
+    return tick_store
+
+store = get_store()
 
 # -------------------- CALLBACK --------------------
 def on_tick(tick):
@@ -151,15 +162,19 @@ with st.sidebar:
         help="Upload historical OHLC data. Format: timestamp,symbol,open,high,low,close,volume"
     )
     
-    if uploaded_file is not None:
+    # Reruns keep the uploaded file around, so only load each upload once
+    if uploaded_file is not None and st.session_state.get("uploaded_file_id") == (uploaded_file.name, uploaded_file.size):
+        st.success(f"✅ {uploaded_file.name} already loaded")
+    elif uploaded_file is not None:
         try:
-            upload_df = pd.read_csv(uploaded_file)
+            upload_table = pa_csv.read_csv(uploaded_file)
             required_cols = ["timestamp", "symbol", "open", "high", "low", "close"]
             
-            if all(col in upload_df.columns for col in required_cols):
+            if all(col in upload_table.column_names for col in required_cols):
                 # Insert into DuckDB
-                store.insert_ohlc_bars(upload_df)
-                st.success(f"✅ Uploaded {len(upload_df)} bars successfully!")
+                store.insert_ohlc_bars(upload_table)
+                st.session_state["uploaded_file_id"] = (uploaded_file.name, uploaded_file.size)
+                st.success(f"✅ Uploaded {upload_table.num_rows} bars successfully!")
             else:
                 st.error(f"❌ CSV must contain: {', '.join(required_cols)}")
         except Exception as e:
@@ -251,8 +266,9 @@ with st.sidebar:
     st.markdown("#### 📊 Data Status")
     
 # -------------------- LOAD DATA --------------------
-df_y = store.fetch_ticks(symbol_y.upper())
-df_x = store.fetch_ticks(symbol_x.upper())
+# Served from the store's in-memory ring buffers, not DuckDB
+df_y = store.fetch_recent(symbol_y.upper(), n=RECENT_TICKS)
+df_x = store.fetch_recent(symbol_x.upper(), n=RECENT_TICKS)
 
 # Display data status in sidebar
 with st.sidebar:
@@ -293,19 +309,60 @@ if len(common_index) < 5:
 y = bars_y.loc[common_index]["close"]
 x = bars_x.loc[common_index]["close"]
 
+# -------------------- CACHED ANALYTICS --------------------
+# Auto-refresh reruns often see the same bars, so the expensive analytics are
+# memoized on a cheap fingerprint of the inputs. Arguments starting with "_"
+# are skipped by Streamlit's hasher.
+def series_key(y, x):
+    return (len(y), float(y.iloc[-1]), y.index[0].value, y.index[-1].value, len(x), float(x.iloc[-1]))
+
+@st.cache_data(ttl=5, max_entries=32)
+def cached_huber_hedge_ratio(key, _y, _x):
+    return huber_hedge_ratio(_y, _x)
+
+@st.cache_data(ttl=5, max_entries=32)
+def cached_kalman_hedge_ratio(key, _y, _x):
+    return kalman_hedge_ratio(_y, _x)
+
+@st.cache_data(ttl=5, max_entries=32)
+def cached_ols_r2(key, _y, _x):
+    return ols_r2(_y, _x)
+
+@st.cache_data(ttl=5, max_entries=32)
+def cached_spread_and_zscore(key, hr, window, _y, _x):
+    return spread_and_zscore(_y, _x, hr, window)
+
+@st.cache_data(ttl=5, max_entries=32)
+def cached_adf_test(key, hr, _spread):
+    return adf_test(_spread)
+
+@st.cache_data(ttl=5, max_entries=32)
+def cached_rolling_corr(key, window, _y, _x):
+    return rolling_corr(_y, _x, window)
+
+@st.cache_data(ttl=5, max_entries=32)
+def cached_cross_corr(key, _y, _x):
+    return cross_corr(_y, _x)
+
 # -------------------- ANALYTICS --------------------
 effective_window = min(window, len(common_index) - 1)
+data_key = series_key(y, x)
 
 if use_kalman:
-    hr_series = kalman_hedge_ratio(y, x)
+    hr_series = cached_kalman_hedge_ratio(data_key, y, x)
     hr = hr_series[-1]
 else:
-    hr = huber_hedge_ratio(y, x)
+    hr = cached_huber_hedge_ratio(data_key, y, x)
+
+# A flat hedge leg (e.g. after the volume filter) leaves no hedge ratio to estimate
+if not np.isfinite(hr):
+    st.warning(f"Not enough price variation in {symbol_x.upper()} over the selected bars to estimate a hedge ratio. Waiting for more data...")
+    st.stop()
 
-spread, z = spread_and_zscore(y, x, hr, effective_window)
-adf_stat, adf_p = adf_test(spread)
-corr = rolling_corr(y, x, effective_window)
-r2 = ols_r2(y, x)
+spread, z = cached_spread_and_zscore(data_key, hr, effective_window, y, x)
+adf_stat, adf_p = cached_adf_test(data_key, hr, spread)
+corr = cached_rolling_corr(data_key, effective_window, y, x)
+r2 = cached_ols_r2(data_key, y, x)
 
 # -------------------- ALERT --------------------
 alert_engine = AlertEngine()
@@ -562,7 +619,7 @@ with tab_corr:
     corr_fig.add_trace(go.Scatter(x=corr.index, y=corr, name="Rolling Correlation"))
     st.plotly_chart(corr_fig, width='stretch')
 
-    lags, corr_vals = cross_corr(y, x)
+    lags, corr_vals = cached_cross_corr(data_key, y, x)
     heatmap_fig = go.Figure(
         data=go.Heatmap(
             z=[corr_vals],
@@ -1,11 +1,29 @@
+import os
+import tempfile
+
 SYMBOLS = ["btcusdt", "ethusdt"]
 DB_PATH = "market.duckdb"
 
+# DuckDB settings for the streaming tick store. A large checkpoint threshold
+# (wal_autocheckpoint is an alias) keeps batched inserts in the WAL instead of
+# checkpointing the database file on every commit.
+DUCKDB_CONFIG = {
+    "access_mode": "READ_WRITE",
+    "allow_unsigned_extensions": False,
+    "threads": 4,
+    "memory_limit": "512MB",
+    "checkpoint_threshold": "256MB",
+    "temp_directory": os.path.join(tempfile.gettempdir(), "duckdb_tmp"),
+}
+
 TIMEFRAMES = {
     "1s": "1s",
     "1m": "1min",
     "5m": "5min"
 }
 
+# Ticks per symbol loaded into the dashboard on each refresh
+RECENT_TICKS = 50_000
+
 DEFAULT_WINDOW = 50
 DEFAULT_Z_THRESHOLD = 2.0
\ No newline at end of file
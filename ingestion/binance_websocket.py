@@ -1,21 +1,24 @@
 import asyncio
-import json
+import orjson
 import websockets
-from datetime import datetime
 
 class BinanceFuturesWS:
     def __init__(self, symbols, on_tick):
         self.symbols = [s.lower() for s in symbols]
-        self.on_tick = on_tick   
+        self.on_tick = on_tick
 
-    async def _connect(self, symbol):
-        url = f"wss://stream.binance.com:9443/ws/{symbol}@trade"
+    async def _connect(self):
+        # One combined stream for all symbols; messages arrive as {"stream": ..., "data": {...}}
+        streams = "/".join(f"{s}@trade" for s in self.symbols)
+        url = f"wss://stream.binance.com:9443/stream?streams={streams}"
         async with websockets.connect(url) as ws:
             async for msg in ws:
-                data = json.loads(msg)
+                data = orjson.loads(msg)["data"]
                 if data.get("e") == "trade":
+                    # Trade time stays as raw epoch milliseconds (UTC);
+                    # the store converts whole batches to timestamps
                     tick = {
-                        "timestamp": datetime.fromtimestamp(data["T"] / 1000),
+                        "timestamp": data["T"],
                         "symbol": data["s"],
                         "price": float(data["p"]),
                         "qty": float(data["q"])
@@ -23,7 +26,5 @@ class BinanceFuturesWS:
                     self.on_tick(tick)
 
     async def start(self):
-        self.tasks = [asyncio.create_task(self._connect(s)) for s in self.symbols]
+        self.tasks = [asyncio.create_task(self._connect())]
         await asyncio.gather(*self.tasks)
-
-
@@ -1,9 +1,46 @@
+import logging
+import threading
+import time
+from collections import deque
+from itertools import islice
+
 import duckdb
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from dateutil.tz import gettz, tzlocal
+
+# Live ticks are buffered in memory and written to DuckDB in batches
+FLUSH_INTERVAL = 0.25   # seconds between background flushes
+FLUSH_BATCH = 1000      # wake the flusher early once this many ticks are pending
+FLUSH_MAX_PENDING = 200_000  # oldest unflushed ticks are dropped beyond this
+FLUSH_BACKOFF_MAX = 5.0      # longest wait (seconds) between retries of a failed flush
+
+# Most recent ticks kept in memory per symbol for the dashboard
+RING_CAPACITY = 200_000
+
+# Tick timestamps are stored as naive local time (as datetime.fromtimestamp gives).
+# gettz() loads the system zone file, which pandas converts with vectorized
+# transition tables; tzlocal() is a per-element fallback (e.g. on Windows)
+LOCAL_TZ = gettz() or tzlocal()
+
+logger = logging.getLogger(__name__)
+
+def ms_to_local(ms):
+    """Epoch milliseconds (UTC) -> naive local timestamps."""
+    return pd.to_datetime(np.asarray(ms, dtype=np.int64), unit="ms", utc=True).tz_convert(LOCAL_TZ).tz_localize(None)
+
+def local_to_ms(ts):
+    """Naive local timestamps -> epoch milliseconds (UTC); ambiguous DST times read as standard time."""
+    ts = pd.DatetimeIndex(ts)
+    utc = ts.tz_localize(LOCAL_TZ, ambiguous=np.zeros(len(ts), dtype=bool), nonexistent="shift_forward")
+    return utc.tz_convert("UTC").tz_localize(None).to_numpy().astype("datetime64[ms]").astype(np.int64)
 
 class TickStore:
-    def __init__(self, path):
-        self.con = duckdb.connect(path)
+    def __init__(self, path, config=None, flush_interval=FLUSH_INTERVAL, batch_size=FLUSH_BATCH,
+                 ring_capacity=RING_CAPACITY):
+        self.con = duckdb.connect(path, config=config or {})
         self.con.execute("""
         CREATE TABLE IF NOT EXISTS ticks (
             timestamp TIMESTAMP,
@@ -12,28 +49,229 @@ class TickStore:
             qty DOUBLE
         )
         """)
+        self.con.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ticks_sym_ts ON ticks(symbol, timestamp)"
+        )
+
+        # The websocket callback, the flusher and Streamlit reads run on
+        # different threads, so every use of the connection goes through the lock
+        self.lock = threading.Lock()
+        self.buffer = deque(maxlen=FLUSH_MAX_PENDING)
+        self.dropped = 0
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # Per-symbol ring buffers of (epoch_ms, price, qty); DuckDB stays
+        # the durable archive but isn't read on every dashboard refresh.
+        # recent_lock guards both the rings and the flush buffer
+        self.recent = {}
+        self.ring_capacity = ring_capacity
+        self.recent_lock = threading.Lock()
+        self.tick_counts = {}   # live ticks received per symbol
+        symbols = [row[0] for row in self.con.execute("SELECT DISTINCT symbol FROM ticks").fetchall()]
+        self._load_recent(symbols)
+
+        self._wakeup = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
 
     def insert_tick(self, tick):
-        df = pd.DataFrame([tick])
-        self.con.execute("INSERT INTO ticks SELECT * FROM df")
+        """Buffer a live tick; its timestamp is epoch milliseconds (UTC)."""
+        with self.recent_lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(tick)
+            ring = self.recent.get(tick["symbol"])
+            if ring is None:
+                ring = self.recent[tick["symbol"]] = deque(maxlen=self.ring_capacity)
+            ring.append((tick["timestamp"], tick["price"], tick["qty"]))
+            self.tick_counts[tick["symbol"]] = self.tick_counts.get(tick["symbol"], 0) + 1
+        if len(self.buffer) >= self.batch_size:
+            self._wakeup.set()
 
-    def fetch_ticks(self, symbol):
-        return self.con.execute(
-            "SELECT * FROM ticks WHERE symbol=? ORDER BY timestamp",
-            [symbol]
-        ).df()
+    def _flush_loop(self):
+        backoff = 0.0
+        dropped = 0
+        while True:
+            if backoff:
+                time.sleep(backoff)
+            else:
+                self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                backoff = 0.0
+            except Exception:
+                # Failed ticks stay buffered (up to FLUSH_MAX_PENDING) and are
+                # retried with exponential backoff
+                backoff = min(max(2 * backoff, self.flush_interval), FLUSH_BACKOFF_MAX)
+                logger.exception("Tick flush failed, retrying in %.2fs (%d ticks pending)",
+                                 backoff, len(self.buffer))
+            if self.dropped > dropped:
+                logger.warning("Flush buffer full, dropped %d oldest ticks", self.dropped - dropped)
+                dropped = self.dropped
 
-    def insert_ohlc_bars(self, df):
+    def flush(self):
+        """
+        Write all buffered ticks to DuckDB with a single INSERT.
+        Called periodically by the flusher thread and on shutdown.
+        """
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        """
+        Body of flush(); the caller holds self.lock.
+        Returns the per-symbol tick counts at the moment the buffer was copied.
         """
-        Insert OHLC bars from uploaded CSV.
+        # Copy in one C call under the lock insert_tick appends with;
+        # ticks are only popped once the INSERT succeeded
+        with self.recent_lock:
+            pending = list(self.buffer)
+            dropped = self.dropped
+            counts = dict(self.tick_counts)
+        if not pending:
+            return counts
+
+        ts, sym, price, qty = [], [], [], []
+        for tick in pending:
+            ts.append(tick["timestamp"])
+            sym.append(tick["symbol"])
+            price.append(tick["price"])
+            qty.append(tick["qty"])
+
+        batch = pd.DataFrame({
+            "timestamp": ms_to_local(ts),
+            "symbol": sym,
+            "price": price,
+            "qty": qty
+        })
+        self.con.register("tick_batch", batch)
+        self.con.execute(
+            "INSERT INTO ticks SELECT timestamp, symbol, price, qty FROM tick_batch"
+        )
+        self.con.unregister("tick_batch")
+
+        with self.recent_lock:
+            # Ticks the cap pushed out meanwhile have already left the buffer
+            for _ in range(max(len(pending) - (self.dropped - dropped), 0)):
+                self.buffer.popleft()
+        return counts
+
+    def fetch_ticks(self, symbol, since=None, limit=None):
+        """
+        Fetch ticks for a symbol in timestamp order.
+        since: only return ticks strictly newer than this timestamp
+        limit: only return the most recent `limit` ticks
+        """
+        query, params = self._ticks_query(symbol, since, limit)
+        with self.lock:
+            return self.con.execute(query, params).df()
+
+    @staticmethod
+    def _ticks_query(symbol, since=None, limit=None):
+        query = "SELECT * FROM ticks WHERE symbol=?"
+        params = [symbol]
+        if since is not None:
+            query += " AND timestamp > ?"
+            params.append(since)
+        if limit is not None:
+            query = f"SELECT * FROM ({query} ORDER BY timestamp DESC LIMIT ?) ORDER BY timestamp"
+            params.append(limit)
+        else:
+            query += " ORDER BY timestamp"
+        return query, params
+
+    def fetch_ohlcv(self, symbol, rule, min_volume=0.0, since=None):
+        """
+        OHLCV bars for a symbol bucketed and liquidity-filtered inside DuckDB,
+        in the same shape as resample_ticks + liquidity_filter.
+        rule: pandas-style bar size, e.g. "1s", "1min", "5min"
+        """
+        query = """
+        SELECT
+            time_bucket(?, timestamp) AS timestamp,
+            arg_min(price, timestamp) AS open,
+            max(price) AS high,
+            min(price) AS low,
+            arg_max(price, timestamp) AS close,
+            sum(qty) AS volume
+        FROM ticks
+        WHERE symbol=?
+        """
+        params = [pd.to_timedelta(rule).to_pytimedelta(), symbol]
+        if since is not None:
+            query += " AND timestamp > ?"
+            params.append(since)
+        query += " GROUP BY 1 HAVING sum(qty) >= ? ORDER BY 1"
+        params.append(min_volume)
+
+        # Buffered ticks belong in the latest bars
+        self.flush()
+        with self.lock:
+            return self.con.execute(query, params).df().set_index("timestamp")
+
+    def _load_recent(self, symbols):
+        """(Re)fill the ring buffers of the given symbols from DuckDB."""
+        # Flush and read back under the connection lock, so DuckDB holds
+        # exactly the ticks up to the cut; insert_tick keeps running meanwhile
+        with self.lock:
+            cut = self._flush()
+            frames = {}
+            for symbol in symbols:
+                query, params = self._ticks_query(symbol, limit=self.ring_capacity)
+                frames[symbol] = self.con.execute(query, params).df()
+
+        rings = {}
+        for symbol, df in frames.items():
+            ts_ms = local_to_ms(df["timestamp"])
+            rings[symbol] = deque(
+                zip(ts_ms.tolist(), df["price"].tolist(), df["qty"].tolist()),
+                maxlen=self.ring_capacity
+            )
+
+        # Carry over the live ticks that arrived after the cut, then swap in
+        with self.recent_lock:
+            for symbol, ring in rings.items():
+                newer = self.tick_counts.get(symbol, 0) - cut.get(symbol, 0)
+                if newer:
+                    ring.extend(reversed(list(islice(reversed(self.recent[symbol]), newer))))
+                self.recent[symbol] = ring
+
+    def fetch_recent(self, symbol, n):
+        """Most recent `n` ticks of a symbol, served from the in-memory ring buffer."""
+        # list() copies the deque in one C call, so it is safe against concurrent appends
+        ticks = list(self.recent.get(symbol, ()))[-n:]
+        df = pd.DataFrame(ticks, columns=["timestamp", "price", "qty"])
+        df["timestamp"] = ms_to_local(df["timestamp"])
+        df.insert(1, "symbol", symbol)
+        return df
+
+    def insert_ohlc_bars(self, table):
+        """
+        Insert OHLC bars from uploaded CSV, given as a pyarrow Table.
         Expected columns: timestamp, symbol, open, high, low, close, volume
         """
         # Convert OHLC bars to individual ticks (using close price)
-        for _, row in df.iterrows():
-            tick = {
-                "timestamp": pd.to_datetime(row["timestamp"]),
-                "symbol": str(row["symbol"]).upper(),
-                "price": float(row["close"]),
-                "qty": float(row.get("volume", 0.0))
-            }
-            self.insert_tick(tick)
\ No newline at end of file
+        if "volume" in table.column_names:
+            qty = pc.cast(table["volume"], pa.float64())
+        else:
+            qty = pa.repeat(pa.scalar(0.0, pa.float64()), table.num_rows)
+
+        ticks_table = pa.table({
+            "timestamp": table["timestamp"],
+            "symbol": pc.utf8_upper(pc.cast(table["symbol"], pa.string())),
+            "price": pc.cast(table["close"], pa.float64()),
+            "qty": qty
+        })
+
+        # DuckDB scans the Arrow columns directly and parses the timestamps itself
+        with self.lock:
+            self.con.register("ohlc_ticks", ticks_table)
+            self.con.execute(
+                "INSERT INTO ticks SELECT CAST(timestamp AS TIMESTAMP), symbol, price, qty FROM ohlc_ticks"
+            )
+            self.con.unregister("ohlc_ticks")
+
+        # Uploaded bars can land anywhere in time, so rebuild the affected buffers
+        self._load_recent(pc.unique(ticks_table["symbol"]).to_pylist())
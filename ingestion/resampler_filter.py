@@ -1,13 +1,23 @@
+import pandas as pd
+import polars as pl
+
 def resample_ticks(df, rule):
-    df = df.set_index("timestamp")
+    # Bucket ticks into OHLCV bars with polars' multi-threaded group_by_dynamic;
+    # only buckets that contain ticks are emitted, like resample + dropna
+    ticks = pl.from_pandas(df[["timestamp", "price", "qty"]]).sort("timestamp")
 
-    ohlcv = df.resample(rule).agg({
-        "price": ["first", "max", "min", "last"],
-        "qty": "sum"
-    })
+    ohlcv = ticks.group_by_dynamic(
+        index_column="timestamp",
+        every=pd.to_timedelta(rule).to_pytimedelta()
+    ).agg([
+        pl.col("price").first().alias("open"),
+        pl.col("price").max().alias("high"),
+        pl.col("price").min().alias("low"),
+        pl.col("price").last().alias("close"),
+        pl.col("qty").sum().alias("volume")
+    ])
 
-    ohlcv.columns = ["open", "high", "low", "close", "volume"]
-    return ohlcv.dropna()
+    return ohlcv.to_pandas().set_index("timestamp")
 
 def liquidity_filter(bars, min_volume):
-    return bars[bars["volume"] >= min_volume]
\ No newline at end of file
+    return bars[bars["volume"] >= min_volume]